@@ -20,17 +20,39 @@ Usage:
 
     # Update just the last 30 days
     python backfill_activities.py --days 30
+
+    # Ignore the resume checkpoint and rescan the full range
+    python backfill_activities.py --months 6 --no-checkpoint
 """
 
 import argparse
+import json
 import os
+import queue
+import re
 import sys
+import threading
 import time
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Callable, Iterable, Iterator, NamedTuple, Optional, Tuple
 
-import pytz
 import requests
+from requests.adapters import HTTPAdapter
+
+# Use orjson for faster JSON parsing when available
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Use ijson to stream activity pages when available
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
 
 # Try to import Firestore (optional for standalone mode)
 try:
@@ -46,24 +68,145 @@ STRAVA_API_BASE = "https://www.strava.com/api/v3"
 STRAVA_TOKEN_URL = "https://www.strava.com/oauth/token"
 FIRESTORE_COLLECTION = "auth"
 FIRESTORE_DOCUMENT = "strava_config"
+CHECKPOINT_FILE = ".dog_patrol_checkpoint.json"
 
 # Rate limiting (Strava: 100 requests per 15 min, 1000 per day)
-REQUEST_DELAY = 0.2  # 200ms between requests (safe margin)
 MAX_RETRIES = 3
 RATE_LIMIT_BUFFER = 5  # Seconds to wait after rate limit reset
+RATE_LIMIT_REQUESTS = 90  # Stay below the 100 non-upload requests per window
+RATE_LIMIT_WINDOW = 900  # 15 minutes
+MAX_WORKERS = 8  # Concurrent rename requests
+PAGE_FETCH_WORKERS = 4  # Activity pages fetched concurrently
+OUTPUT_BATCH_SIZE = 50  # Activities listed per stdout write
+ACTIVITY_QUEUE_SIZE = 200  # Activities buffered between the fetcher and the renamer
+MAX_IN_FLIGHT_RENAMES = 2 * MAX_WORKERS  # Renames submitted but not yet finished
+
+# Matches names that already carry the dog theme
+_DOG_RE = re.compile(r"Dog Patrol|Sniffari|🐕|👃")
+
+# Activity name for each hour of the day (index = hour, 0-23)
+_HOUR_TO_NAME = tuple(
+    "Morning Shakeout 🐕‍🦺" if 4 <= h < 11 else
+    "Lunch Break Sniffari 👃🐕‍🦺" if 11 <= h < 14 else
+    "Evening Patrol 🐕‍🦺"  # 14:00 - 03:59
+    for h in range(24)
+)
+TOKEN_EXPIRY_MARGIN = 60  # Refresh this many seconds before the access token expires
+
+
+def parse_json(response: requests.Response) -> Any:
+    """Parse a JSON response body, using orjson when available."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+class ActivitySummary(NamedTuple):
+    """The subset of a Strava activity the backfill needs."""
+    id: int
+    type: Optional[str]
+    trainer: bool
+    name: str
+    start_date_local: Optional[str]
+    start_date: Optional[str]
+    
+    @classmethod
+    def from_dict(cls, activity: Dict[str, Any]) -> "ActivitySummary":
+        return cls(
+            activity.get("id"),
+            activity.get("type"),
+            activity.get("trainer", False),
+            activity.get("name", "Unnamed"),
+            activity.get("start_date_local"),
+            activity.get("start_date"),
+        )
+
+
+class _RateLimiter:
+    """
+    Thread-safe fixed-window limiter aligned with Strava's 15-minute windows.
+    Allows `capacity` requests per window, then blocks until the next reset.
+    After a 429, pause() holds every caller for the given time.
+    close() wakes every waiting caller with an error (used on Ctrl-C).
+    """
+    
+    def __init__(self, capacity: int, next_reset: Callable[[], Tuple[datetime, int]]):
+        self.capacity = capacity
+        self.next_reset = next_reset  # Returns (next_reset_datetime, seconds_until_reset)
+        self.count = 0
+        self.window_end = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+    
+    def acquire(self) -> None:
+        """Block until the current window has room for a request, then count it."""
+        while True:
+            if self._stop.is_set():
+                raise RuntimeError("Rate limiter closed")
+            
+            with self._lock:
+                now = time.time()
+                
+                if now >= self.window_end:
+                    # New window: count from zero until the next reset boundary
+                    _, seconds_until_reset = self.next_reset()
+                    self.window_end = now + seconds_until_reset
+                    self.count = 0
+                
+                if self.count < self.capacity:
+                    self.count += 1
+                    return
+                
+                wait_time = self.window_end - now
+            
+            # Interruptible sleep; close() sets the event
+            self._stop.wait(wait_time)
+    
+    def pause(self, seconds: float) -> None:
+        """Mark the current window as used up and block all callers for `seconds`."""
+        with self._lock:
+            self.count = self.capacity
+            self.window_end = max(self.window_end, time.time() + seconds)
+    
+    def close(self) -> None:
+        """Stop handing out requests and release every blocked caller."""
+        self._stop.set()
 
 
 class StravaBackfiller:
     """Handles backfilling of Strava activity names."""
     
     def __init__(self, client_id: str, client_secret: str, refresh_token: str, 
-                 timezone: str = "America/Los_Angeles", dry_run: bool = False):
+                 timezone: str = "America/Los_Angeles", dry_run: bool = False,
+                 checkpoint_path: Optional[str] = None):
         self.client_id = client_id
         self.client_secret = client_secret
         self.refresh_token = refresh_token
         self.timezone = timezone
         self.dry_run = dry_run
         self.access_token = None
+        self.expires_at = 0.0
+        
+        # Resume state (see load_checkpoint)
+        self.checkpoint_path = checkpoint_path
+        self.last_processed_start: Optional[str] = None
+        self.scanned_after: Optional[str] = None  # Start of the range the watermark covers
+        self._run_scanned_after: Optional[str] = None  # Range this run will cover once complete
+        self.renamed_ids: set = set()
+        
+        # Reuse keep-alive connections to Strava instead of a new TLS handshake per call.
+        # All calls go to one host; the pool holds one connection per worker and blocks
+        # rather than opening extra short-lived connections.
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(
+            pool_connections=1, pool_maxsize=MAX_WORKERS, pool_block=True, max_retries=0
+        ))
+        
+        self.limiter = _RateLimiter(RATE_LIMIT_REQUESTS, self._calculate_next_reset_time)
+        self._stats_lock = threading.Lock()
+        self._token_lock = threading.Lock()
+        self._output_lock = threading.Lock()
+        self._checkpoint_lock = threading.Lock()
         self.stats = {
             "total_fetched": 0,
             "walks_found": 0,
@@ -73,6 +216,66 @@ class StravaBackfiller:
             "errors": 0
         }
     
+    def _emit(self, lines: List[str]) -> None:
+        """Write several output lines with a single stdout write (keeps worker output coherent)."""
+        if not lines:
+            return
+        with self._output_lock:
+            sys.stdout.write("\n".join(lines) + "\n")
+    
+    def load_checkpoint(self) -> None:
+        """Load resume state written by a previous run, if any."""
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return
+        
+        with open(self.checkpoint_path) as f:
+            checkpoint = json.load(f)
+        
+        self.last_processed_start = checkpoint.get("last_processed_start")
+        self.scanned_after = checkpoint.get("scanned_after")
+        self.renamed_ids = set(checkpoint.get("renamed_ids", []))
+    
+    def save_checkpoint(self) -> None:
+        """Write resume state to disk (no-op in dry-run mode)."""
+        if self.dry_run or not self.checkpoint_path:
+            return
+        
+        with self._checkpoint_lock:
+            checkpoint = {
+                "last_processed_start": self.last_processed_start,
+                "scanned_after": self.scanned_after,
+                "renamed_ids": sorted(self.renamed_ids),
+            }
+            # Write to a temp file first so an interrupted write can't corrupt the checkpoint
+            tmp_path = f"{self.checkpoint_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(checkpoint, f)
+            os.replace(tmp_path, self.checkpoint_path)
+    
+    def resume_after(self, after: datetime) -> datetime:
+        """
+        Move `after` past the last fully processed activity from the checkpoint.
+        Only applies when the requested range starts at or after the range the
+        checkpoint covers; asking for an older range rescans it in full.
+        """
+        requested = after.astimezone(timezone.utc)
+        self._run_scanned_after = requested.isoformat()
+        
+        if not self.last_processed_start or not self.scanned_after:
+            return after
+        
+        if requested < datetime.fromisoformat(self.scanned_after):
+            return after
+        
+        # The covered range extends back to the checkpoint's start
+        self._run_scanned_after = self.scanned_after
+        
+        # start_date is UTC, e.g. "2024-12-26T15:30:00Z"
+        checkpoint_start = datetime.fromisoformat(self.last_processed_start.replace("Z", "+00:00"))
+        if checkpoint_start > requested:
+            return checkpoint_start
+        return after
+    
     def _parse_rate_limit_headers(self, headers: dict) -> dict:
         """
         Parse Strava rate limit headers.
@@ -126,38 +329,28 @@ class StravaBackfiller:
         
         Returns: (next_reset_datetime, seconds_until_reset)
         """
-        now = datetime.now()
-        current_minute = now.minute
-        
-        # Find next reset minute (0, 15, 30, 45)
-        if current_minute < 15:
-            next_reset_minute = 15
-        elif current_minute < 30:
-            next_reset_minute = 30
-        elif current_minute < 45:
-            next_reset_minute = 45
-        else:
-            next_reset_minute = 0
-        
-        # Calculate next reset time
-        if next_reset_minute == 0:
-            # Next hour
-            next_reset = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
-        else:
-            next_reset = now.replace(minute=next_reset_minute, second=0, microsecond=0)
-        
-        seconds_until_reset = int((next_reset - now).total_seconds())
+        # Reset boundaries are multiples of 900s on the epoch (timezone offsets are whole quarter-hours)
+        now = time.time()
+        seconds_until_reset = RATE_LIMIT_WINDOW - (int(now) % RATE_LIMIT_WINDOW)
+        next_reset = datetime.fromtimestamp(int(now) + seconds_until_reset)
         
         return next_reset, seconds_until_reset
     
     def _make_request_with_retry(self, method: str, url: str, **kwargs) -> requests.Response:
         """Make a request with smart retry logic for rate limiting."""
         for attempt in range(MAX_RETRIES):
-            response = requests.request(method, url, **kwargs)
+            self.limiter.acquire()
+            
+            # The wait above can outlive the token; this is a no-op while it is valid
+            if url != STRAVA_TOKEN_URL:
+                self.get_access_token()
+            
+            response = self.session.request(method, url, **kwargs)
             
             if response.status_code == 429:
                 # Parse rate limit headers
                 limits = self._parse_rate_limit_headers(response.headers)
+                response.close()  # Release the connection; the body is unused
                 
                 # Calculate wait time until next reset
                 next_reset, seconds_until_reset = self._calculate_next_reset_time()
@@ -167,27 +360,33 @@ class StravaBackfiller:
                 now = datetime.now()
                 retry_time = now + timedelta(seconds=wait_time)
                 
-                print(f"\n   ⏳ Rate limited (429) - Attempt {attempt + 1}/{MAX_RETRIES}")
-                print(f"   Current time: {now.strftime('%H:%M:%S')}")
-                print()
+                lines = [
+                    f"\n   ⏳ Rate limited (429) - Attempt {attempt + 1}/{MAX_RETRIES}",
+                    f"   Current time: {now.strftime('%H:%M:%S')}",
+                    "",
+                ]
                 
                 # Show both rate limits (overall and non-upload)
                 if limits.get('overall_15min_usage') is not None:
-                    print(f"   Overall 15-min:    {limits['overall_15min_usage']}/{limits['overall_15min_limit']} requests")
+                    lines.append(f"   Overall 15-min:    {limits['overall_15min_usage']}/{limits['overall_15min_limit']} requests")
                 
                 if limits.get('read_15min_usage') is not None:
-                    print(f"   Non-upload 15-min: {limits['read_15min_usage']}/{limits['read_15min_limit']} requests ⚠️  LIMITING FACTOR")
+                    lines.append(f"   Non-upload 15-min: {limits['read_15min_usage']}/{limits['read_15min_limit']} requests ⚠️  LIMITING FACTOR")
                 
                 if limits.get('read_daily_usage') is not None:
-                    print(f"   Daily usage:       {limits['read_daily_usage']}/{limits['read_daily_limit']} requests")
+                    lines.append(f"   Daily usage:       {limits['read_daily_usage']}/{limits['read_daily_limit']} requests")
                 
-                print()
-                print(f"   Next 15-min reset: {next_reset.strftime('%H:%M:%S')}")
-                print(f"   Waiting {seconds_until_reset}s until reset + {RATE_LIMIT_BUFFER}s buffer = {wait_time}s total")
-                print(f"   Will retry at: {retry_time.strftime('%H:%M:%S')}")
-                print()
+                lines += [
+                    "",
+                    f"   Next 15-min reset: {next_reset.strftime('%H:%M:%S')}",
+                    f"   Waiting {seconds_until_reset}s until reset + {RATE_LIMIT_BUFFER}s buffer = {wait_time}s total",
+                    f"   Will retry at: {retry_time.strftime('%H:%M:%S')}",
+                    "",
+                ]
+                self._emit(lines)
                 
-                time.sleep(wait_time)
+                # Hold every worker until the window resets; acquire() blocks on retry
+                self.limiter.pause(wait_time)
                 continue
             
             return response
@@ -196,7 +395,14 @@ class StravaBackfiller:
         return response
     
     def get_access_token(self) -> str:
-        """Get a fresh access token using the refresh token."""
+        """Get an access token using the refresh token, reusing it while still valid."""
+        with self._token_lock:
+            if self.access_token and time.time() < self.expires_at - TOKEN_EXPIRY_MARGIN:
+                return self.access_token
+            return self._refresh_access_token()
+    
+    def _refresh_access_token(self) -> str:
+        """Exchange the refresh token for a new access token."""
         print("🔑 Getting access token...")
         
         response = self._make_request_with_retry(
@@ -214,137 +420,260 @@ class StravaBackfiller:
         if response.status_code != 200:
             raise Exception(f"Failed to refresh token: {response.status_code} - {response.text}")
         
-        token_data = response.json()
+        token_data = parse_json(response)
         self.access_token = token_data.get("access_token")
+        self.expires_at = float(token_data.get("expires_at", 0))
+        self.session.headers["Authorization"] = f"Bearer {self.access_token}"
         print("✅ Access token obtained")
         return self.access_token
     
-    def fetch_activities(self, after: datetime, per_page: int = 100) -> List[Dict[str, Any]]:
-        """Fetch all activities after a given date."""
-        print(f"📥 Fetching activities since {after.strftime('%Y-%m-%d')}...")
+    def _fetch_page(self, after_timestamp: int, page: int, per_page: int) -> List[ActivitySummary]:
+        """
+        Fetch a single page of activities.
+        With ijson the body is parsed one activity at a time, so the full page is never materialized.
+        """
+        url = f"{STRAVA_API_BASE}/athlete/activities"
+        params = {
+            "after": after_timestamp,
+            "per_page": per_page,
+            "page": page
+        }
+        
+        response = self._make_request_with_retry("GET", url, params=params, timeout=10, stream=IJSON_AVAILABLE)
+        
+        if response.status_code != 200:
+            raise Exception(f"Failed to fetch activities: {response.status_code} - {response.text}")
+        
+        try:
+            if IJSON_AVAILABLE:
+                response.raw.decode_content = True
+                activities = ijson.items(response.raw, "item")
+            else:
+                activities = parse_json(response)
+            
+            return [ActivitySummary.from_dict(activity) for activity in activities]
+        finally:
+            response.close()
+    
+    def fetch_activities(self, after: datetime, per_page: int = 100) -> Iterator[ActivitySummary]:
+        """
+        Yield all activities after a given date, page by page as they arrive.
+        Page 1 is fetched alone; if it is full, later pages are fetched
+        PAGE_FETCH_WORKERS at a time until a short page shows the end.
+        """
+        self._emit([f"📥 Fetching activities since {after.strftime('%Y-%m-%d')}..."])
         
-        activities = []
-        page = 1
         after_timestamp = int(after.timestamp())
         
-        while True:
-            url = f"{STRAVA_API_BASE}/athlete/activities"
-            headers = {"Authorization": f"Bearer {self.access_token}"}
-            params = {
-                "after": after_timestamp,
-                "per_page": per_page,
-                "page": page
-            }
-            
-            response = self._make_request_with_retry("GET", url, headers=headers, params=params, timeout=10)
-            
-            if response.status_code != 200:
-                raise Exception(f"Failed to fetch activities: {response.status_code} - {response.text}")
-            
-            page_activities = response.json()
-            
-            if not page_activities:
-                break
-            
-            activities.extend(page_activities)
-            print(f"   Fetched page {page}: {len(page_activities)} activities")
-            
-            page += 1
-            time.sleep(REQUEST_DELAY)
+        page_activities = self._fetch_page(after_timestamp, 1, per_page)
+        if page_activities:
+            self._emit([f"   Fetched page 1: {len(page_activities)} activities"])
+        self.stats["total_fetched"] += len(page_activities)
+        yield from page_activities
+        
+        if len(page_activities) == per_page:
+            page = 1
+            with ThreadPoolExecutor(max_workers=PAGE_FETCH_WORKERS) as executor:
+                while True:
+                    pages = range(page + 1, page + 1 + PAGE_FETCH_WORKERS)
+                    results = executor.map(
+                        lambda p: self._fetch_page(after_timestamp, p, per_page), pages
+                    )
+                    
+                    # Pages are yielded in order as soon as each one completes
+                    done = False
+                    for p, page_activities in zip(pages, results):
+                        if page_activities:
+                            self._emit([f"   Fetched page {p}: {len(page_activities)} activities"])
+                            self.stats["total_fetched"] += len(page_activities)
+                            yield from page_activities
+                        if len(page_activities) < per_page:
+                            done = True
+                    
+                    if done:
+                        break
+                    
+                    page = pages[-1]
         
-        self.stats["total_fetched"] = len(activities)
-        print(f"✅ Total activities fetched: {len(activities)}")
-        return activities
+        self._emit([f"✅ Total activities fetched: {self.stats['total_fetched']}"])
     
     def determine_activity_name(self, start_date_local: str) -> str:
         """
         Determine activity name based on time of day.
-        Same logic as the Cloud Function.
+        Same time ranges as the Cloud Function.
         
-        Note: start_date_local is ALREADY in local time from Strava.
+        Note: start_date_local is ALREADY in local time from Strava
+        (e.g. "2024-12-26T07:30:00Z"), so the hour is read straight from the string.
         """
-        # Parse the datetime - it's already in local time
-        dt = datetime.fromisoformat(start_date_local.replace("Z", ""))
-        hour = dt.hour
-        
-        if 4 <= hour < 11:
-            return "Morning Shakeout 🐕‍🦺"
-        elif 11 <= hour < 14:
-            return "Lunch Break Sniffari 👃🐕‍🦺"
-        else:
-            return "Evening Patrol 🐕‍🦺"
+        return _HOUR_TO_NAME[int(start_date_local[11:13])]
     
     def is_already_dog_named(self, name: str) -> bool:
         """Check if activity is already named with dog theme."""
-        dog_keywords = ["Dog Patrol", "Sniffari", "🐕", "👃"]
-        return any(keyword in name for keyword in dog_keywords)
+        return bool(_DOG_RE.search(name))
     
     def update_activity_name(self, activity_id: int, new_name: str) -> bool:
         """Update activity name via Strava API."""
         url = f"{STRAVA_API_BASE}/activities/{activity_id}"
-        headers = {"Authorization": f"Bearer {self.access_token}"}
         data = {"name": new_name}
         
-        response = self._make_request_with_retry("PUT", url, headers=headers, json=data, timeout=10)
+        response = self._make_request_with_retry("PUT", url, json=data, timeout=10)
         
         if response.status_code != 200:
-            print(f"   ❌ Failed to update activity {activity_id}: {response.status_code}")
+            self._emit([f"   ❌ Failed to update activity {activity_id}: {response.status_code}"])
             return False
         
         return True
     
-    def process_activities(self, activities: List[Dict[str, Any]]) -> None:
-        """Process and rename eligible activities."""
+    def _rename_activity(self, item: Tuple[int, str, str, str]) -> None:
+        """Rename a single activity (runs on a worker thread)."""
+        activity_id, new_name, old_name, date_str = item
+        
+        success = self.update_activity_name(activity_id, new_name)
+        
+        with self._stats_lock:
+            if success:
+                self.stats["renamed"] += 1
+            else:
+                self.stats["errors"] += 1
+        
+        if success:
+            # renamed_ids is only touched under _checkpoint_lock
+            with self._checkpoint_lock:
+                self.renamed_ids.add(activity_id)
+            self.save_checkpoint()
+            self._emit([f"   ✅ Renamed {date_str}: '{old_name}' -> '{new_name}'"])
+    
+    def _produce_activities(self, activities: Iterable[ActivitySummary], activity_queue: queue.Queue,
+                            errors: List[BaseException]) -> None:
+        """Drain `activities` into the queue (runs on a background thread)."""
+        try:
+            for activity in activities:
+                activity_queue.put(activity)
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            activity_queue.put(None)
+    
+    def process_activities(self, activities: Iterable[ActivitySummary]) -> None:
+        """
+        Process and rename eligible activities.
+        `activities` is drained on a background thread through a bounded queue,
+        so renames start while later pages are still being fetched.
+        """
         print("\n🔍 Processing activities...\n")
         
-        for i, activity in enumerate(activities, 1):
-            activity_id = activity.get("id")
-            activity_type = activity.get("type")
-            trainer = activity.get("trainer", False)
-            old_name = activity.get("name", "Unnamed")
-            start_date = activity.get("start_date_local")
-            
-            # Filter 1: Must be a Walk
-            if activity_type != "Walk":
-                continue
-            
-            self.stats["walks_found"] += 1
-            
-            # Filter 2: Must be outdoor
-            if trainer:
-                continue
-            
-            # Determine new name
-            new_name = self.determine_activity_name(start_date)
-            
-            # Skip if already has the correct name
-            if old_name == new_name:
-                print(f"[{i}/{len(activities)}] ✅ Already correct: {old_name}")
-                self.stats["already_named"] += 1
-                continue
+        # IDs renamed by an interrupted earlier run (snapshot; workers add to renamed_ids)
+        with self._checkpoint_lock:
+            skip_ids = frozenset(self.renamed_ids)
+        
+        activity_queue: queue.Queue = queue.Queue(maxsize=ACTIVITY_QUEUE_SIZE)
+        producer_errors: List[BaseException] = []
+        producer = threading.Thread(
+            target=self._produce_activities,
+            args=(activities, activity_queue, producer_errors),
+            daemon=True,
+        )
+        producer.start()
+        
+        executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+        # Bounds pending renames so a slow (rate-limited) pool applies backpressure to the queue
+        in_flight = threading.BoundedSemaphore(MAX_IN_FLIGHT_RENAMES)
+        worker_errors: List[BaseException] = []
+        submitted = 0
+        
+        def on_rename_done(future) -> None:
+            in_flight.release()
+            if not future.cancelled() and future.exception() is not None:
+                worker_errors.append(future.exception())
+        
+        latest_start = None
+        lines = []
+        i = 0
+        
+        try:
+            while True:
+                activity = activity_queue.get()
+                if activity is None:
+                    break
+                
+                if activity.start_date and (latest_start is None or activity.start_date > latest_start):
+                    latest_start = activity.start_date
+                
+                # Outdoor Walks only
+                # (activities renamed by an interrupted earlier run are skipped too)
+                if activity.type != "Walk" or activity.trainer or activity.id in skip_ids:
+                    continue
+                
+                self.stats["walks_found"] += 1
+                i += 1
+                
+                new_name = self.determine_activity_name(activity.start_date_local)
+                
+                if activity.name == new_name:
+                    lines.append(f"✅ Already correct: {new_name}")
+                    self.stats["already_named"] += 1
+                else:
+                    # "2024-12-26T07:30:00Z" -> "2024-12-26 07:30"
+                    date_str = activity.start_date_local[:16].replace("T", " ")
+                    
+                    lines.append(f"[{self.stats['to_rename'] + 1}] 📝 {date_str}")
+                    lines.append(f"   Old: {activity.name}")
+                    lines.append(f"   New: {new_name}")
+                    
+                    if not self.dry_run:
+                        if not in_flight.acquire(blocking=False):
+                            # About to wait on the workers; show what's been listed so far
+                            self._emit(lines)
+                            lines = []
+                            in_flight.acquire()
+                        
+                        item = (activity.id, new_name, activity.name, date_str)
+                        executor.submit(self._rename_activity, item).add_done_callback(on_rename_done)
+                        submitted += 1
+                    else:
+                        lines.append(f"   🔍 [DRY RUN - would rename]")
+                    
+                    lines.append("")
+                    self.stats["to_rename"] += 1
+                
+                if i % OUTPUT_BATCH_SIZE == 0:
+                    self._emit(lines)
+                    lines = []
             
-            # Format date for display
-            dt = datetime.fromisoformat(start_date.replace("Z", ""))
-            date_str = dt.strftime("%Y-%m-%d %H:%M")
+            self._emit(lines)
+            lines = []
             
-            print(f"[{i}/{len(activities)}] 📝 {date_str}")
-            print(f"   Old: {old_name}")
-            print(f"   New: {new_name}")
+            if producer_errors:
+                raise producer_errors[0]
             
-            self.stats["to_rename"] += 1
+            if submitted:
+                self._emit([f"\n✏️  Waiting for the last renames ({submitted} submitted, {MAX_WORKERS} workers)...\n"])
             
-            if not self.dry_run:
-                if self.update_activity_name(activity_id, new_name):
-                    print(f"   ✅ Renamed successfully")
-                    self.stats["renamed"] += 1
-                else:
-                    self.stats["errors"] += 1
-                
-                time.sleep(REQUEST_DELAY)
-            else:
-                print(f"   🔍 [DRY RUN - would rename]")
+            executor.shutdown(wait=True)
             
-            print()
+            # Surface worker exceptions
+            if worker_errors:
+                raise worker_errors[0]
+        except BaseException:
+            # On Ctrl-C, release workers waiting on the rate limit so the process can exit
+            self.limiter.close()
+            raise
+        finally:
+            self._emit(lines)
+            # On Ctrl-C, drop queued renames instead of waiting for them
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        # Only advance the watermark once every rename in this range succeeded,
+        # so failed activities are picked up again on the next run
+        if self.stats["errors"] == 0:
+            if self._run_scanned_after:
+                self.scanned_after = self._run_scanned_after
+            if latest_start:
+                self.last_processed_start = latest_start
+                # Everything up to the watermark is done; the ID list is no longer needed
+                with self._checkpoint_lock:
+                    self.renamed_ids.clear()
+            self.save_checkpoint()
     
     def print_summary(self) -> None:
         """Print summary statistics."""
@@ -352,7 +681,7 @@ class StravaBackfiller:
         print("📊 SUMMARY")
         print("="*60)
         print(f"Total activities fetched:    {self.stats['total_fetched']}")
-        print(f"Walk activities found:       {self.stats['walks_found']}")
+        print(f"Outdoor walks found:         {self.stats['walks_found']}")
         print(f"Already dog-named:           {self.stats['already_named']}")
         print(f"Activities to rename:        {self.stats['to_rename']}")
         
@@ -411,6 +740,8 @@ def main():
                        help="Timezone for activity times (default: America/Los_Angeles)")
     parser.add_argument("--dry-run", action="store_true", 
                        help="Preview changes without actually renaming")
+    parser.add_argument("--no-checkpoint", action="store_true",
+                       help=f"Ignore and don't write the resume checkpoint ({CHECKPOINT_FILE})")
     
     args = parser.parse_args()
     
@@ -450,6 +781,7 @@ def main():
             sys.exit(1)
     
     # Run backfill
+    backfiller = None
     try:
         print("\n🐕‍🦺 Dog Patrol Activity Backfiller")
         print("="*60)
@@ -464,27 +796,37 @@ def main():
             client_secret=client_secret,
             refresh_token=refresh_token,
             timezone=args.timezone,
-            dry_run=args.dry_run
+            dry_run=args.dry_run,
+            checkpoint_path=None if args.no_checkpoint else CHECKPOINT_FILE
         )
         
+        # Resume from a previous run
+        backfiller.load_checkpoint()
+        resumed_after = backfiller.resume_after(after)
+        if resumed_after != after:
+            print(f"⏩ Resuming from checkpoint: skipping activities before {resumed_after.strftime('%Y-%m-%d %H:%M')} UTC")
+            print("   Use --no-checkpoint to rescan the full range\n")
+            after = resumed_after
+        
         # Get access token
         backfiller.get_access_token()
         
-        # Fetch activities
-        activities = backfiller.fetch_activities(after)
+        # Fetch and rename (pages are processed as they arrive)
+        backfiller.process_activities(backfiller.fetch_activities(after))
         
-        if not activities:
+        if backfiller.stats["total_fetched"] == 0:
             print("\n📭 No activities found in the specified time range.")
             return
         
-        # Process and rename
-        backfiller.process_activities(activities)
-        
         # Print summary
         backfiller.print_summary()
         
     except KeyboardInterrupt:
         print("\n\n⚠️  Interrupted by user")
+        if backfiller:
+            backfiller.save_checkpoint()
+            if backfiller.checkpoint_path and not backfiller.dry_run:
+                print(f"💾 Progress saved to {backfiller.checkpoint_path}")
         sys.exit(1)
     except Exception as e:
         print(f"\n❌ Error: {e}")
@@ -1,14 +1,23 @@
 import os
 import json
 import logging
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 
-import pytz
 import requests
 from google.cloud import firestore
 from functions_framework import http
 
+# Use orjson for faster JSON handling when available
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -16,41 +25,111 @@ logger = logging.getLogger(__name__)
 # Initialize Firestore client
 db = firestore.Client()
 
+# Shared HTTP session; persists across warm invocations so Strava connections are reused
+SESSION = requests.Session()
+
 # Constants
 STRAVA_API_BASE = "https://www.strava.com/api/v3"
 STRAVA_TOKEN_URL = "https://www.strava.com/oauth/token"
 FIRESTORE_COLLECTION = "auth"
 FIRESTORE_DOCUMENT = "strava_config"
+TOKEN_EXPIRY_MARGIN = 60  # Refresh this many seconds before the access token expires
+CONFIG_CACHE_TTL = 300  # Seconds to reuse the Firestore config between reads
+RECENT_EVENTS_MAX = 256  # Activity IDs remembered for duplicate webhook detection
+
+# Activity name for each hour of the day (index = hour, 0-23)
+_HOUR_TO_NAME = tuple(
+    "Morning Shakeout 🐕‍🦺" if 4 <= h < 11 else
+    "Lunch Break Sniffari 👃🐕‍🦺" if 11 <= h < 14 else
+    "Evening Patrol 🐕‍🦺"  # 14:00 - 03:59
+    for h in range(24)
+)
 
 # Environment variables
 STRAVA_CLIENT_ID = os.environ.get("STRAVA_CLIENT_ID")
 STRAVA_CLIENT_SECRET = os.environ.get("STRAVA_CLIENT_SECRET")
 TIMEZONE = os.environ.get("TIMEZONE", "America/Los_Angeles")
 
+# Access token cache (survives across warm invocations)
+_ACCESS_TOKEN: Optional[str] = None
+_TOKEN_EXPIRES_AT = 0.0
+
+# Firestore config cache: field -> (value, fetched_at)
+# The document only changes on refresh_token rotation
+_CONFIG_CACHE: Dict[str, Tuple[Any, float]] = {}
+
+# Recently seen activity IDs (Strava occasionally delivers the same webhook twice)
+_RECENT_EVENTS: "OrderedDict[int, None]" = OrderedDict()
+_RECENT_EVENTS_LOCK = threading.Lock()
+
+
+def parse_json(response: requests.Response) -> Any:
+    """Parse a JSON response body, using orjson when available."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+def dump_json(data: Any) -> str:
+    """Serialize data to a JSON string, using orjson when available."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data).decode()
+    return json.dumps(data)
 
-def get_firestore_config() -> Dict[str, Any]:
-    """Retrieve configuration from Firestore."""
+
+def get_firestore_field(field_name: str) -> Any:
+    """
+    Retrieve a single configuration field from Firestore.
+    Only the requested field is fetched, and the value is cached for CONFIG_CACHE_TTL seconds.
+    """
+    cached = _CONFIG_CACHE.get(field_name)
+    if cached and time.time() - cached[1] < CONFIG_CACHE_TTL:
+        return cached[0]
+    
     doc_ref = db.collection(FIRESTORE_COLLECTION).document(FIRESTORE_DOCUMENT)
-    doc = doc_ref.get()
+    doc = doc_ref.get(field_paths=[field_name])
     if not doc.exists:
         raise ValueError(f"Firestore document {FIRESTORE_COLLECTION}/{FIRESTORE_DOCUMENT} does not exist")
-    return doc.to_dict()
+    
+    value = (doc.to_dict() or {}).get(field_name)
+    if value is not None:
+        _CONFIG_CACHE[field_name] = (value, time.time())
+    return value
 
 
-def update_firestore_config(field: str, value: str) -> None:
-    """Update a field in the Firestore configuration."""
+def update_firestore_config(fields: Dict[str, Any], batch: Optional[firestore.WriteBatch] = None) -> None:
+    """
+    Update fields in the Firestore configuration with a single write.
+    If a WriteBatch is given, the update is added to it and the caller commits.
+    """
     doc_ref = db.collection(FIRESTORE_COLLECTION).document(FIRESTORE_DOCUMENT)
-    doc_ref.update({field: value})
-    logger.info(f"Updated {field} in Firestore")
+    
+    if batch is not None:
+        batch.update(doc_ref, fields)
+        return
+    
+    doc_ref.update(fields)
+    
+    # Keep the cached copy in sync so the next call doesn't re-read
+    now = time.time()
+    for field, value in fields.items():
+        _CONFIG_CACHE[field] = (value, now)
+    
+    logger.info(f"Updated {', '.join(fields)} in Firestore")
 
 
 def get_access_token() -> str:
     """
     Get a valid access token by refreshing using the stored refresh_token.
+    Returns the cached token while it is still valid.
     Updates Firestore if a new refresh_token is returned.
     """
-    config = get_firestore_config()
-    refresh_token = config.get("refresh_token")
+    global _ACCESS_TOKEN, _TOKEN_EXPIRES_AT
+    
+    if _ACCESS_TOKEN and time.time() < _TOKEN_EXPIRES_AT - TOKEN_EXPIRY_MARGIN:
+        return _ACCESS_TOKEN
+    
+    refresh_token = get_firestore_field("refresh_token")
     
     if not refresh_token:
         raise ValueError("refresh_token not found in Firestore")
@@ -59,7 +138,7 @@ def get_access_token() -> str:
         raise ValueError("STRAVA_CLIENT_ID and STRAVA_CLIENT_SECRET must be set")
     
     # Refresh the access token
-    response = requests.post(
+    response = SESSION.post(
         STRAVA_TOKEN_URL,
         data={
             "client_id": STRAVA_CLIENT_ID,
@@ -74,30 +153,61 @@ def get_access_token() -> str:
         logger.error(f"Token refresh failed: {response.status_code} - {response.text}")
         raise Exception(f"Failed to refresh token: {response.status_code}")
     
-    token_data = response.json()
+    token_data = parse_json(response)
     new_access_token = token_data.get("access_token")
     new_refresh_token = token_data.get("refresh_token")
     
     # Update Firestore if refresh_token changed
     if new_refresh_token and new_refresh_token != refresh_token:
-        update_firestore_config("refresh_token", new_refresh_token)
-        logger.info("Updated refresh_token in Firestore")
+        update_firestore_config({"refresh_token": new_refresh_token})
+    
+    _ACCESS_TOKEN = new_access_token
+    _TOKEN_EXPIRES_AT = float(token_data.get("expires_at", 0))
     
     return new_access_token
 
 
+def invalidate_access_token() -> None:
+    """Drop the cached access token so the next call refreshes it (e.g. after a 401)."""
+    global _ACCESS_TOKEN, _TOKEN_EXPIRES_AT
+    _ACCESS_TOKEN = None
+    _TOKEN_EXPIRES_AT = 0.0
+
+
 def get_activity_details(activity_id: int, access_token: str) -> Dict[str, Any]:
     """Fetch activity details from Strava API."""
     url = f"{STRAVA_API_BASE}/activities/{activity_id}"
     headers = {"Authorization": f"Bearer {access_token}"}
     
-    response = requests.get(url, headers=headers, timeout=10)
+    response = SESSION.get(url, headers=headers, timeout=10)
+    
+    if response.status_code == 401:
+        invalidate_access_token()
     
     if response.status_code != 200:
         logger.error(f"Failed to fetch activity {activity_id}: {response.status_code} - {response.text}")
         raise Exception(f"Failed to fetch activity: {response.status_code}")
     
-    return response.json()
+    return parse_json(response)
+
+
+def is_duplicate_event(object_id: int) -> bool:
+    """Record object_id as seen; return True if it was already seen recently."""
+    with _RECENT_EVENTS_LOCK:
+        if object_id in _RECENT_EVENTS:
+            _RECENT_EVENTS.move_to_end(object_id)
+            return True
+        
+        _RECENT_EVENTS[object_id] = None
+        if len(_RECENT_EVENTS) > RECENT_EVENTS_MAX:
+            _RECENT_EVENTS.popitem(last=False)
+        return False
+
+
+def forget_event(object_id: int) -> None:
+    """Remove object_id from the seen set so a retried delivery is processed again."""
+    with _RECENT_EVENTS_LOCK:
+        _RECENT_EVENTS.pop(object_id, None)
 
 
 def determine_activity_name(start_date_local: str) -> str:
@@ -112,16 +222,10 @@ def determine_activity_name(start_date_local: str) -> str:
     # Parse the ISO format datetime string from Strava
     # start_date_local is ALREADY in local time, no conversion needed
     # Example: "2024-12-26T07:30:00Z"
-    dt = datetime.fromisoformat(start_date_local.replace("Z", ""))
-    hour = dt.hour
-    
-    # Determine time range
-    if 4 <= hour < 11:
-        return "Morning Shakeout 🐕‍🦺"
-    elif 11 <= hour < 14:
-        return "Lunch Break Sniffari 👃🐕‍🦺"
-    else:  # 14:00 - 03:59 (14-23 and 0-3)
-        return "Evening Patrol 🐕‍🦺"
+    if start_date_local.endswith("Z"):
+        start_date_local = start_date_local[:-1]
+    dt = datetime.fromisoformat(start_date_local)
+    return _HOUR_TO_NAME[dt.hour]
 
 
 def update_activity_name(activity_id: int, new_name: str, access_token: str) -> None:
@@ -130,7 +234,10 @@ def update_activity_name(activity_id: int, new_name: str, access_token: str) ->
     headers = {"Authorization": f"Bearer {access_token}"}
     data = {"name": new_name}
     
-    response = requests.put(url, headers=headers, json=data, timeout=10)
+    response = SESSION.put(url, headers=headers, json=data, timeout=10)
+    
+    if response.status_code == 401:
+        invalidate_access_token()
     
     if response.status_code != 200:
         logger.error(f"Failed to update activity {activity_id}: {response.status_code} - {response.text}")
@@ -178,8 +285,7 @@ def handle_webhook_verification(request) -> tuple:
     
     # Get verify_token from Firestore
     try:
-        config = get_firestore_config()
-        stored_verify_token = config.get("verify_token")
+        stored_verify_token = get_firestore_field("verify_token")
         
         if not stored_verify_token:
             logger.error("verify_token not found in Firestore")
@@ -193,7 +299,7 @@ def handle_webhook_verification(request) -> tuple:
         # Return challenge
         response_data = {"hub.challenge": hub_challenge}
         logger.info("Webhook verification successful")
-        return (json.dumps(response_data), 200, {"Content-Type": "application/json"})
+        return (dump_json(response_data), 200, {"Content-Type": "application/json"})
     
     except Exception as e:
         logger.error(f"Error during webhook verification: {str(e)}", exc_info=True)
@@ -209,9 +315,15 @@ def handle_event_processing(request) -> tuple:
             logger.warning("No JSON data in POST request")
             return ("OK", 200)
         
-        logger.info(f"Received event: {json.dumps(event_data)}")
+        logger.info(f"Received event: {dump_json(event_data)}")
         
-        # Filter 1: Check aspect_type is "create"
+        # Filter 1: Check object_type is "activity" (ignore athlete events)
+        object_type = event_data.get("object_type")
+        if object_type != "activity":
+            logger.info(f"Skipping event: object_type={object_type} (not 'activity')")
+            return ("OK", 200)
+        
+        # Filter 2: Check aspect_type is "create"
         aspect_type = event_data.get("aspect_type")
         if aspect_type != "create":
             logger.info(f"Skipping event: aspect_type={aspect_type} (not 'create')")
@@ -223,6 +335,11 @@ def handle_event_processing(request) -> tuple:
             logger.warning("Missing object_id in event data")
             return ("OK", 200)
         
+        # Filter 3: Drop duplicate deliveries before any Firestore/Strava calls
+        if is_duplicate_event(object_id):
+            logger.info(f"Skipping activity {object_id}: duplicate event")
+            return ("OK", 200)
+        
         logger.info(f"Processing activity creation: {object_id}")
         
         # Get access token
@@ -230,22 +347,24 @@ def handle_event_processing(request) -> tuple:
             access_token = get_access_token()
         except Exception as e:
             logger.error(f"Failed to get access token: {str(e)}")
+            forget_event(object_id)
             return ("OK", 200)
         
-        # Filter 2: Fetch activity details
+        # Fetch activity details
         try:
             activity = get_activity_details(object_id, access_token)
         except Exception as e:
             logger.error(f"Failed to fetch activity details: {str(e)}")
+            forget_event(object_id)
             return ("OK", 200)
         
-        # Filter 3: Check activity type is "Walk"
+        # Filter 4: Check activity type is "Walk"
         activity_type = activity.get("type")
         if activity_type != "Walk":
             logger.info(f"Skipping activity {object_id}: type={activity_type} (not 'Walk')")
             return ("OK", 200)
         
-        # Filter 4: Check trainer is False (outdoor only)
+        # Filter 5: Check trainer is False (outdoor only)
         trainer = activity.get("trainer", False)
         if trainer:
             logger.info(f"Skipping activity {object_id}: trainer=True (indoor activity)")
@@ -268,6 +387,7 @@ def handle_event_processing(request) -> tuple:
             logger.info(f"Renamed activity {object_id}: '{old_name}' -> '{new_name}'")
         except Exception as e:
             logger.error(f"Failed to update activity name: {str(e)}")
+            forget_event(object_id)
             return ("OK", 200)
         
         return ("OK", 200)